@@ -1,25 +1,82 @@
 from boto3 import resource
+from boto3.s3.transfer import TransferConfig
+from botocore.config import Config
+from botocore.exceptions import ClientError
+from cachetools import TTLCache
+from collections import defaultdict
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from itertools import islice
+from listing_fast import build_listing, human_readable_size
 from pathlib import Path
+from threading import Event, Lock, Thread
 from time import time
-import json
-
-# Helper function to convert bytes to a human-readable file size
-def human_readable_size(bytes):
-    # Define the suffixes for each size unit (e.g., KB, MB, GB, etc.)
-    units = ['B', 'KB', 'MB', 'GB', 'TB', 'PB', 'EB', 'ZB', 'YB']
-
-    # If the size is zero, return '0 B'
-    if bytes == 0:
-        return "0 B"
-
-    # Calculate the appropriate unit (e.g., KB, MB, etc.)
-    i = 0
-    while bytes >= 1024 and i < len(units) - 1:
-        bytes /= 1024.0  # Divide by 1024 to convert to next unit
-        i += 1
-    
-    # Return the size rounded to two decimal places with the corresponding unit
-    return f"{bytes:.2f} {units[i]}"
+import os
+import pickle
+
+# Connections kept open to the S3 service, shared by all concurrent requests
+MAX_POOL_CONNECTIONS = int(os.environ.get('S3_MAX_POOL_CONNECTIONS', 64))
+
+# Seconds before the folder size cache is considered stale (15 minutes by default)
+CACHE_TTL = int(os.environ.get('CACHE_TTL', 900))
+
+# Folder sizes updated by writes are saved after this many writes, and checked
+# for unsaved changes every this many seconds
+CACHE_SAVE_WRITES = 50
+CACHE_SAVE_INTERVAL = 30
+
+# Object metadata is cached for up to 4096 objects, for 5 minutes each
+META_CACHE_SIZE = 4096
+META_CACHE_TTL = 300
+
+# Bulk deletes send up to 1000 keys per request (the S3 limit), 8 requests at a time
+DELETE_BATCH_SIZE = 1000
+DELETE_WORKERS = 8
+
+# Sizes of keys being deleted are read from a folder listing only when at least
+# this many of them share the folder; otherwise each key gets its own HEAD request
+DELETE_LIST_THRESHOLD = 100
+
+# Listings are always paginated so buckets with more than 1000 keys are not truncated
+LIST_PAGINATION = {'PageSize': 1000}
+
+# Number of listings run concurrently while refreshing the cache
+REFRESH_WORKERS = 32
+
+# Characters a large key range is split on so its parts can be listed concurrently,
+# in key order, and the most split points used per split (at most 8 new ranges)
+SPLIT_CHARS = '-.0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZ_abcdefghijklmnopqrstuvwxyz'
+SPLIT_MAX_POINTS = 7
+
+# Uploads above 8 MB are sent as 8 MB parts, up to 10 at a time
+TRANSFER_CONFIG = TransferConfig(
+    multipart_threshold=8 * 1024 * 1024,
+    multipart_chunksize=8 * 1024 * 1024,
+    max_concurrency=10,
+    use_threads=True,
+)
+
+# Helper function to pick the keys a listing range is split at
+def _split_points(prefix, first_key, start_after, stop_at):
+    # Never split above the range itself: the prefix, or where its bounds differ
+    floor = os.path.commonprefix([start_after, stop_at]) if stop_at is not None else prefix
+
+    # Start one character above where the keys of the last page differed, which is
+    # where the keys that follow it are most likely to vary
+    depth = len(os.path.commonprefix([first_key, start_after])) - 1
+    base = start_after[:max(depth, len(floor))]
+
+    # Go one character deeper while the range is too narrow to split at this depth
+    while len(base) < len(start_after):
+        points = [
+            base + char for char in SPLIT_CHARS
+            if start_after < base + char and (stop_at is None or base + char < stop_at)
+        ]
+        if points:
+            # Split off the next few ranges; the last one keeps the rest and is split
+            # again if it turns out to be large
+            return points[:SPLIT_MAX_POINTS]
+        base = start_after[:len(base) + 1]
+    return []
 
 # MinIO class for interacting with an S3-compatible object storage service
 class MinIO():
@@ -33,8 +90,18 @@ class MinIO():
         :param s3_bucket: The name of the bucket to interact with.
         """
         self.s3 = self._get_s3_resource(s3_access_key, s3_access_secrect, s3_endpoint)
+        self._client = self.s3.meta.client  # Thread-safe client shared by all methods
         self.bucket = s3_bucket
+        self._list_paginator = self._client.get_paginator('list_objects_v2')
+        self._cache_lock = Lock()  # Guards cache updates from concurrent writes
+        self._unsaved_writes = 0
+        self._stop_saving = Event()  # Set by close() to stop the periodic save
+        self._meta_cache = TTLCache(maxsize=META_CACHE_SIZE, ttl=META_CACHE_TTL)  # Object metadata by key
+        self._meta_lock = Lock()  # TTLCache is not thread-safe
+        self._inflight = {}  # HEAD requests in progress by key and caller kind, guarded by _meta_lock
+        self._lookups = {}  # [lookups in progress, write generation] by key, guarded by _meta_lock
         self.cache = self.load_cache()  # Load the cache on initialization
+        Thread(target=self._save_periodically, daemon=True).start()
 
     def _get_s3_resource(self, s3_access_key, s3_access_secrect, s3_endpoint):
         """
@@ -45,57 +112,35 @@ class MinIO():
         :param s3_endpoint: The endpoint URL of the S3 service.
         :return: An S3 resource object.
         """
+        config = Config(
+            max_pool_connections = MAX_POOL_CONNECTIONS,
+            retries = {'mode': 'adaptive', 'max_attempts': 5},
+            tcp_keepalive = True,
+            connect_timeout = 3,
+            read_timeout = 60,
+        )
         s3 = resource(
             "s3",
             aws_access_key_id = s3_access_key,
             aws_secret_access_key = s3_access_secrect,
             endpoint_url = s3_endpoint,
+            config = config,
         )
         return s3
 
-    def calculate_folder_size(self, prefix, cache):
-        """
-        Recursively calculates the total size of a folder and its contents.
-
-        :param prefix: The folder path in the S3 bucket.
-        :param cache: A dictionary used to cache folder sizes.
-        :return: The total size of the folder in bytes.
-        """
-        objs = self.s3.meta.client.list_objects_v2(Bucket=self.bucket, Prefix=prefix, Delimiter='/')
-        folders = objs.get('CommonPrefixes', None)
-        files = objs.get('Contents', None)
-
-        total_size = 0
-
-        # Recursively calculate the size of any subfolders
-        if folders:
-            for folder in folders:
-                folder_name = folder['Prefix'].replace(prefix, '')[:-1]
-                total_size += self.calculate_folder_size("{}{}/".format(prefix, folder_name), cache)
-
-        # Sum up the sizes of files in the folder
-        if files:
-            for file in files:
-                total_size += file['Size']
-  
-        # Cache the calculated size for this folder
-        cache[prefix] = total_size
-
-        return total_size
-
     def load_cache(self):
         """
-        Loads the cache from a local JSON file, if available, and checks if the cache is still valid.
+        Loads the cache from a local pickle file, if available, and checks if the cache is still valid.
 
         :return: The cache dictionary with folder sizes or a fresh cache if expired.
         """
         cache = {}
-        my_file = Path("{}.json".format(self.bucket))  # Cache file named after the bucket
+        my_file = Path("{}.pickle".format(self.bucket))  # Cache file named after the bucket
         if my_file.exists():
-            with my_file.open() as read_file:
-                cache = json.load(read_file)
-                # Refresh the cache if it is older than 15 minutes (900 seconds)
-                if cache['time'] < time() + 900:
+            with my_file.open('rb') as read_file:
+                cache = pickle.load(read_file)
+                # Refresh the cache if it is older than CACHE_TTL seconds
+                if time() - cache.get('time', 0) > CACHE_TTL:
                     cache = self.refresh_cache(cache)
         else:
             # No cache exists, so create a fresh one
@@ -118,28 +163,28 @@ class MinIO():
         Creates a new S3 bucket.
 
         :param bucket_name: The name of the bucket to create.
-        :return: True if the bucket is successfully created.
+        :return: True if the bucket is successfully created, or an error message.
         """
         try:
             self.s3.create_bucket(Bucket=bucket_name)
         except Exception as e:
             print(e)
-            exit(0)  # Exit if the bucket creation fails
-        return True
+            return None, str(e)
+        return True, None
 
     def delete_bucket(self, bucket_name):
         """
         Deletes an existing S3 bucket.
 
         :param bucket_name: The name of the bucket to delete.
-        :return: True if the bucket is successfully deleted.
+        :return: True if the bucket is successfully deleted, or an error message.
         """
         try:
             self.s3.Bucket(bucket_name).delete()
         except Exception as e:
             print(e)
-            exit(0)  # Exit if the bucket deletion fails
-        return True
+            return None, str(e)
+        return True, None
 
     def get_bucket_objects(self, prefix=''):
         """
@@ -148,39 +193,18 @@ class MinIO():
         :param prefix: The folder or prefix to filter objects by.
         :return: A dictionary containing 'folders' and 'files' information.
         """
-        response = {}
-
         try:
-            objs = self.s3.meta.client.list_objects_v2(Bucket=self.bucket, Prefix=prefix, Delimiter='/')
-            folders = objs.get('CommonPrefixes', None)
-            files = objs.get('Contents', None)
-
-            response['folders'] = []
-            response['files'] = []
-            response['prefix'] = objs.get('Prefix').split('/')[:-1]  # Extract prefix parts
-            response['bucket'] = objs.get('Name')
-
-            # Add folder details to the response
-            if folders:
-                for folder in folders:
-                    folder_name = folder['Prefix'].replace(prefix, '')[:-1]
-                    folder_size = self.cache.get(folder['Prefix'], 0)  # Get cached folder size
-                    response['folders'].append({
-                        "name": folder_name,
-                        "path": folder['Prefix'],
-                        "size": human_readable_size(folder_size),
-                        "url": "?prefix={}".format(folder['Prefix'])
-                    })
-            
-            # Add file details to the response
-            if files:
-                for file in files:
-                    response['files'].append({
-                        "key": file['Key'].replace(prefix, ''),
-                        "last_modified": str(file['LastModified']),
-                        "size": human_readable_size(file['Size']),
-                        "path": file['Key']
-                    })
+            pages = list(self._list_paginator.paginate(
+                Bucket=self.bucket, Prefix=prefix, Delimiter='/', PaginationConfig=LIST_PAGINATION
+            ))
+            response = build_listing(
+                [folder for page in pages for folder in page.get('CommonPrefixes', [])],
+                [file for page in pages for file in page.get('Contents', [])],
+                prefix,
+                self.cache,
+            )
+            response['prefix'] = pages[0].get('Prefix').split('/')[:-1]  # Extract prefix parts
+            response['bucket'] = pages[0].get('Name')
 
         except Exception as e:
             print(e)
@@ -188,40 +212,87 @@ class MinIO():
 
         return response, None
 
-    def get_object(self, path):
+    def get_object(self, path, if_none_match=None):
         """
-        Fetches the content of an object (file) from the S3 bucket by its path.
+        Fetches an object (file) from the S3 bucket by its path.
+
+        The body is returned as an unread stream so callers can forward it in chunks
+        instead of holding the whole file in memory. Callers must close it.
 
         :param path: The key (path) of the object to fetch.
-        :return: The name of the file and its content.
+        :param if_none_match: An ETag the caller already has; the object is only
+                              fetched if it no longer matches.
+        :return: The name of the file, the S3 response holding the content stream
+                 and its size (None if not modified), and the object's current 'ETag'
+                 and 'Last-Modified' HTTP headers, when S3 sent them.
         """
-        content_object = self.s3.Object(self.bucket, path)
         file_name = path.split('/')[-1]  # Extract the file name from the path
-        file_content = content_object.get()['Body'].read()  # Read the content of the file
-        return file_name, file_content
+        params = {'Bucket': self.bucket, 'Key': path}
+        if if_none_match:
+            params['IfNoneMatch'] = if_none_match
+
+        try:
+            response = self._client.get_object(**params)
+        except ClientError as e:
+            # S3 reports a matching ETag as a '304' error that still carries the headers
+            if e.response.get('Error', {}).get('Code') == '304':
+                return file_name, None, self._validators(e.response)
+            raise
+        return file_name, response, self._validators(response)
+
+    def _validators(self, response):
+        """
+        Picks the headers clients revalidate their copy of an object with.
+
+        :param response: A get_object response, or the response of its 304 error.
+        :return: The 'ETag' and 'Last-Modified' headers present in the response.
+        """
+        headers = response['ResponseMetadata']['HTTPHeaders']
+        return {name: headers[name.lower()] for name in ('ETag', 'Last-Modified') if headers.get(name.lower())}
 
     def get_object_info(self, key):
         """
         Retrieves metadata of an object in the S3 bucket.
 
+        Results are cached for a few minutes and dropped when the object is
+        replaced or deleted through this API.
+
         :param key: The key (path) of the object to fetch metadata for.
         :return: A dictionary containing the metadata or an error message.
         """
+        with self._meta_lock:
+            object_details = self._meta_cache.get(key)
+            if object_details is not None:
+                return object_details, None
+            # Writes to the key from here on bump its generation
+            lookup = self._lookups.setdefault(key, [0, 0])
+            lookup[0] += 1
+            generation = lookup[1]
+
         try:
-            response = self.s3.meta.client.head_object(Bucket=self.bucket, Key=key)
+            response = self._head_object(key)
 
             object_details = {
                 'Size': human_readable_size(response['ContentLength']),
-                'LastModified': str(response['LastModified']),
+                'LastModified': response['LastModified'].isoformat(),
                 'ContentType': response['ContentType'],
                 'ETag': response['ETag'],
                 'Metadata': response.get('Metadata', {})
             }
 
+            with self._meta_lock:
+                # The object was replaced or deleted during the lookup, so the result may be stale
+                if lookup[1] == generation:
+                    self._meta_cache[key] = object_details
             return object_details, None
         except Exception as e:
             print(e)
             return None, e
+        finally:
+            with self._meta_lock:
+                lookup[0] -= 1
+                if not lookup[0]:
+                    del self._lookups[key]
 
     def delete_object(self, key):
         """
@@ -230,59 +301,355 @@ class MinIO():
         :param key: The key (path) of the object to delete.
         :return: A message indicating success or failure.
         """
-        try:
-            response = self.s3.meta.client.delete_object(Bucket=self.bucket, Key=key)
+        result, err = self.delete_objects_bulk([key])
+        if err:
+            return None, f"Could not delete object '{key}' , {err}"
+        return {"message": f"Object '{key}' deleted successfully from bucket '{self.bucket}'."}, None
 
-            # Check if the deletion was successful (HTTPStatusCode 204)
-            if response.get('ResponseMetadata', {}).get('HTTPStatusCode') == 204:
-                message = {"message": f"Object '{key}' deleted successfully from bucket '{self.bucket}'."}
-            else:
-                message = {"message": f"Failed to delete object '{key}' from bucket '{self.bucket}'."}
+    def delete_objects_bulk(self, keys):
+        """
+        Deletes several objects from the S3 bucket.
 
-            return message, None
+        Keys are sent in batches of up to 1000 per request, and the batches are
+        sent concurrently.
+
+        :param keys: The keys (paths) of the objects to delete.
+        :return: A message indicating success or failure.
+        """
+        try:
+            keys = list(dict.fromkeys(keys))  # Drop duplicate keys, keeping their order
+
+            key_iter = iter(keys)
+            batches = list(iter(lambda: list(islice(key_iter, DELETE_BATCH_SIZE)), []))
+            with ThreadPoolExecutor(max_workers=DELETE_WORKERS) as executor:
+                sizes = self._object_sizes(keys, executor)
+                futures = [executor.submit(self._delete_batch, batch) for batch in batches]
+
+            # A batch that raised counts as failed for all of its keys; the other
+            # batches were applied by S3 and must still update the caches
+            failed = set()
+            errors = []
+            for batch, future in zip(batches, futures):
+                try:
+                    batch_errors = future.result()
+                except Exception as e:
+                    print(e)
+                    failed.update(batch)
+                    errors.append(f"batch of {len(batch)} objects starting at '{batch[0]}': {e}")
+                    continue
+                failed.update(error['Key'] for error in batch_errors)
+                errors.extend(f"'{error['Key']}': {error.get('Message', error.get('Code'))}" for error in batch_errors)
+
+            # Only objects that were actually deleted leave the caches
+            deleted = [key for key in keys if key not in failed]
+            self._adjust_ancestors({key: -sizes.get(key, 0) for key in deleted})
+            self._evict_meta(deleted)
+
+            if errors:
+                return None, f"Could not delete {len(failed)} of {len(keys)} objects: {', '.join(errors)}"
+            return {"message": f"{len(keys)} objects deleted successfully from bucket '{self.bucket}'."}, None
         except Exception as e:
             print(e)
-            return None, f"Could not delete object '{key}' , {e}"
+            return None, str(e)
+
+    def _delete_batch(self, keys):
+        """
+        Deletes up to 1000 objects from the S3 bucket in a single request.
 
-    def put_object(self, key, data):
+        :param keys: The keys (paths) of the objects to delete.
+        :return: A list of errors for the objects that could not be deleted.
+        """
+        response = self._client.delete_objects(
+            Bucket=self.bucket,
+            Delete={'Objects': [{'Key': key} for key in keys], 'Quiet': True},
+        )
+        return response.get('Errors', [])
+
+    def put_object(self, key, fileobj):
         """
         Uploads a new object (file) to the S3 bucket.
 
+        Large files are split into parts that are uploaded concurrently.
+
         :param key: The key (path) where the object will be stored.
-        :param data: The content of the object to upload.
+        :param fileobj: A readable file-like object with the content to upload.
         :return: A message indicating success or failure.
         """
         try:
-            s3object = self.s3.Object(self.bucket, key)
-            response = s3object.put(Body=(data))
-
-            # Check for successful upload (HTTPStatusCode 200)
-            if response["ResponseMetadata"]["HTTPStatusCode"] != 200:
-                return {"message": f"Failed to add Object '{key}'."}
+            # Measure the upload without reading it
+            start = fileobj.tell()
+            fileobj.seek(0, os.SEEK_END)
+            size = fileobj.tell() - start
+            fileobj.seek(start)
+
+            old_size = self._object_size(key)  # Size of the object being replaced, if any
+
+            # Raises on failure, including failed multipart uploads
+            self._client.upload_fileobj(fileobj, self.bucket, key, Config=TRANSFER_CONFIG)
+            self._adjust_ancestors({key: size - old_size})
+            self._evict_meta([key])
             return {"message": f"Object '{key}' was added successfully."}, None
         except Exception as e:
             print(e)
             return None, str(e)
         
+    def _evict_meta(self, keys):
+        """
+        Drops cached metadata of objects that were replaced or deleted.
+
+        :param keys: The keys (paths) of the objects that were written.
+        """
+        with self._meta_lock:
+            for key in keys:
+                self._meta_cache.pop(key, None)
+                # Keeps lookups already in progress from caching what they read
+                if key in self._lookups:
+                    self._lookups[key][1] += 1
+
+    def _head_object(self, key, for_write=False):
+        """
+        Fetches the metadata of an object, sharing the request between concurrent callers.
+
+        The first caller for a key sends the HEAD request; callers asking for the same
+        key while it is in flight wait for its result instead of sending their own.
+        Requests made before a write are not shared with metadata lookups, which would
+        otherwise get the object as it was before the write.
+
+        :param key: The key (path) of the object.
+        :param for_write: Whether the caller is about to replace or delete the object.
+        :return: The head_object response. Errors are raised to every waiting caller.
+        """
+        inflight_key = (key, for_write)
+        with self._meta_lock:
+            future = self._inflight.get(inflight_key)
+            leader = future is None
+            if leader:
+                future = self._inflight[inflight_key] = Future()
+
+        if not leader:
+            return future.result()
+
+        try:
+            response = self._client.head_object(Bucket=self.bucket, Key=key)
+            future.set_result(response)
+            return response
+        except Exception as e:
+            future.set_exception(e)
+            raise
+        finally:
+            with self._meta_lock:
+                del self._inflight[inflight_key]
+
+    def _object_size(self, key):
+        """
+        Looks up the size of an object in the S3 bucket.
+
+        :param key: The key (path) of the object.
+        :return: The size of the object in bytes, or 0 if it does not exist.
+        """
+        try:
+            return self._head_object(key, for_write=True)['ContentLength']
+        except ClientError:
+            return 0
+
+    def _object_sizes(self, keys, executor):
+        """
+        Looks up the sizes of several objects in the S3 bucket.
+
+        Lookups run concurrently on the given executor. Folders holding at least
+        DELETE_LIST_THRESHOLD of the keys are read with one listing that stops
+        after the last wanted key; every other key gets its own HEAD request.
+
+        :param keys: The keys (paths) of the objects.
+        :param executor: The executor to run the lookups on.
+        :return: A dictionary mapping each existing key to its size in bytes.
+        """
+        folders = defaultdict(set)
+        for key in keys:
+            folders[key[:key.rfind('/') + 1]].add(key)
+
+        head_keys = []
+        listings = []
+        for folder, folder_keys in folders.items():
+            if len(folder_keys) >= DELETE_LIST_THRESHOLD:
+                listings.append(executor.submit(self._folder_sizes, folder, folder_keys))
+            else:
+                head_keys.extend(folder_keys)
+
+        sizes = dict(zip(head_keys, executor.map(self._object_size, head_keys)))
+        for listing in listings:
+            sizes.update(listing.result())
+        return sizes
+
+    def _folder_sizes(self, folder, keys):
+        """
+        Looks up the sizes of several objects in one folder with a listing.
+
+        :param folder: The folder path the objects are in.
+        :param keys: The keys (paths) of the objects, all directly in the folder.
+        :return: A dictionary mapping each existing key to its size in bytes.
+        """
+        last_key = max(keys)
+        sizes = {}
+        pages = self._list_paginator.paginate(
+            Bucket=self.bucket, Prefix=folder, Delimiter='/', PaginationConfig=LIST_PAGINATION
+        )
+        for page in pages:
+            for obj in page.get('Contents', []):
+                if obj['Key'] > last_key:
+                    return sizes  # Keys are listed in order, so the rest are not wanted
+                if obj['Key'] in keys:
+                    sizes[obj['Key']] = obj['Size']
+        return sizes
+
+    def _adjust_ancestors(self, deltas):
+        """
+        Applies size changes to every cached folder on the changed objects' paths.
+
+        Keeps folder sizes current after writes made through this API without
+        walking the bucket again. The cache is saved once enough writes or time
+        have accumulated.
+
+        :param deltas: A dictionary mapping the keys (paths) of the objects that
+                       changed to their change in size in bytes.
+        """
+        with self._cache_lock:
+            for key, delta in deltas.items():
+                idx = key.find('/')
+                while idx != -1:
+                    folder = key[:idx + 1]
+                    self.cache[folder] = self.cache.get(folder, 0) + delta
+                    idx = key.find('/', idx + 1)
+
+            self._unsaved_writes += len(deltas)
+            if self._unsaved_writes >= CACHE_SAVE_WRITES:
+                self._save_cache(self.cache)
+
+    def flush_cache(self):
+        """
+        Saves folder size changes made by writes that have not been saved yet.
+        """
+        with self._cache_lock:
+            if self._unsaved_writes:
+                self._save_cache(self.cache)
+
+    def _save_periodically(self):
+        """
+        Flushes the cache every CACHE_SAVE_INTERVAL seconds until close() is called,
+        so the last writes before a quiet period are not left unsaved.
+        """
+        while not self._stop_saving.wait(CACHE_SAVE_INTERVAL):
+            self.flush_cache()
+
+    def close(self):
+        """
+        Stops the periodic save and saves any pending cache changes.
+        """
+        self._stop_saving.set()
+        self.flush_cache()
+
+    def _save_cache(self, cache):
+        """
+        Saves the cache to a local file.
+
+        The file is written next to the target and swapped in with os.replace, so a
+        crash never leaves a partially written cache behind.
+
+        :param cache: The cache dictionary to save.
+        """
+        my_file = Path("{}.pickle".format(self.bucket))
+        tmp_file = my_file.with_suffix('.pickle.tmp')
+        with tmp_file.open('wb') as result_file:
+            pickle.dump(cache, result_file, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_file, my_file)
+        self._unsaved_writes = 0
+
+    def _size_range(self, prefix, start_after=None, stop_at=None, split=True):
+        """
+        Calculates folder sizes for one range of keys under a prefix.
+
+        Only the first page of the range is read. If the range holds more keys than
+        that, the rest of it is split into smaller ranges to be listed concurrently,
+        so a single large folder does not leave the refresh listing it sequentially.
+        A range that was just split off is first continued with one more page, since
+        most of them hold little more than a page and splitting them again would
+        mostly produce empty ranges. Only the thread-safe client is used here.
+
+        :param prefix: The folder path in the S3 bucket.
+        :param start_after: Only keys after this one are included.
+        :param stop_at: Only keys up to and including this one are included.
+        :param split: Whether the rest of the range may be split if it does not fit
+                      in one page.
+        :return: A dictionary mapping folder paths to their size in bytes within
+                 the range, and the (prefix, start_after, stop_at, split) ranges
+                 still left.
+        """
+        params = {'Bucket': self.bucket, 'Prefix': prefix, 'PaginationConfig': LIST_PAGINATION}
+        if start_after is not None:
+            params['StartAfter'] = start_after
+        page = next(iter(self._list_paginator.paginate(**params)))
+
+        sizes = defaultdict(int)
+        first_key = None
+        for obj in page.get('Contents', []):
+            key = obj['Key']
+            if stop_at is not None and key > stop_at:
+                return sizes, []  # Reached the end of the range
+            size = obj['Size']
+
+            # Add the object's size to every folder on its path ('a/', 'a/b/', ...)
+            idx = key.find('/')
+            while idx != -1:
+                sizes[key[:idx + 1]] += size
+                idx = key.find('/', idx + 1)
+
+            if first_key is None:
+                first_key = key
+            start_after = key
+
+        if not page.get('IsTruncated'):
+            return sizes, []
+        if not split:
+            return sizes, [(prefix, start_after, stop_at, True)]
+
+        # Split what is left of the range at SPLIT_CHARS boundaries. The open-ended
+        # last range may split again right away, the bounded ones after one more page
+        bounds = [start_after] + _split_points(prefix, first_key, start_after, stop_at) + [stop_at]
+        return sizes, [(prefix, low, high, high is None) for low, high in zip(bounds, bounds[1:])]
+
     def refresh_cache(self, cache):
         """
         Refreshes the cache by recalculating the size of all folders in the S3 bucket.
 
+        Top-level folders are listed concurrently on a thread pool without a delimiter,
+        and any folder larger than one page is split into key ranges that are listed
+        concurrently as well.
+
         :param cache: The existing cache to be refreshed.
         :return: The updated cache dictionary.
         """
-        objs = self.s3.meta.client.list_objects_v2(Bucket=self.bucket, Prefix='', Delimiter='/')
-        folders = objs.get('CommonPrefixes', None)
+        pages = self._list_paginator.paginate(
+            Bucket=self.bucket, Prefix='', Delimiter='/', PaginationConfig=LIST_PAGINATION
+        )
+        folders = [folder['Prefix'] for page in pages for folder in page.get('CommonPrefixes', [])]
+        sizes = defaultdict(int)
 
         if folders:
-            # Recalculate the size for each folder
-            for folder in folders:
-                folder_name = folder['Prefix']
-                cache[folder_name] = self.calculate_folder_size(folder_name, cache)
+            # List each top-level folder on its own worker, queueing the ranges that
+            # come back until the whole bucket is covered
+            with ThreadPoolExecutor(max_workers=REFRESH_WORKERS) as executor:
+                pending = {executor.submit(self._size_range, folder) for folder in folders}
+                while pending:
+                    done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        range_sizes, ranges = future.result()
+                        for folder, size in range_sizes.items():
+                            sizes[folder] += size
+                        pending.update(executor.submit(self._size_range, *r) for r in ranges)
+
+        cache.update(sizes)
 
         # Save the refreshed cache to a local file
-        my_file = Path("{}.json".format(self.bucket))
-        with my_file.open('w') as result_file:
-            cache['time'] = time()  # Add the current timestamp
-            json.dump(cache, result_file, indent=2, default=str)
+        cache['time'] = time()  # Add the current timestamp
+        self._save_cache(cache)
         return cache
@@ -1,11 +1,14 @@
 from MinIO import *
-from base64 import b64decode
+from base64 import urlsafe_b64decode
 
 from fastapi import FastAPI, HTTPException, status
-from fastapi import File, UploadFile, Response
+from fastapi import Body, File, Header, UploadFile, Response
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import ORJSONResponse, StreamingResponse
+from starlette.background import BackgroundTask
 
+from anyio import to_thread
+from contextlib import asynccontextmanager
 from dotenv import load_dotenv
 
 import os
@@ -20,8 +23,25 @@ s3 = MinIO(
   s3_bucket=os.environ['S3_BUCKET'],
 )
 
+@asynccontextmanager
+async def lifespan(app):
+  # Handlers are sync and run on AnyIO's worker threads, so S3 calls never block
+  # the event loop; widen the thread pool so more of them can overlap
+  to_thread.current_default_thread_limiter().total_tokens = int(os.environ.get('S3_WORKER_THREADS', 64))
+  yield
+  # Save folder size changes from recent writes before shutting down
+  s3.close()
+
+def decode_path(path):
+  # Paths arrive Base64 encoded; the URL-safe decoder accepts both the standard
+  # alphabet and the '-'/'_' one, which needs no percent-encoding in query strings
+  return urlsafe_b64decode(path).decode('utf-8')
+
+# Size of the chunks object downloads are streamed in
+CHUNK_SIZE = 1024 * 1024
+
 origins = ["*"]
-app = FastAPI()
+app = FastAPI(lifespan=lifespan)
 
 app.add_middleware(
     CORSMiddleware,
@@ -33,10 +53,10 @@ app.add_middleware(
 
 @app.get("/objects")
 def get_objects_handler(prefix):
-  prefix = b64decode(prefix).decode('utf-8')
+  prefix = decode_path(prefix)
   result, err = s3.get_bucket_objects(prefix)
   if result:
-    return JSONResponse(content=result, status_code=status.HTTP_200_OK)
+    return ORJSONResponse(content=result, status_code=status.HTTP_200_OK)
   raise HTTPException(
         status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
         detail=err,
@@ -44,35 +64,57 @@ def get_objects_handler(prefix):
 
 @app.get("/object_info")
 def get_object_info_handler(path):
-  path = b64decode(path).decode('utf-8')
+  path = decode_path(path)
   result, err = s3.get_object_info(path)
   if result:
-    return JSONResponse(content=result, status_code=status.HTTP_200_OK)
+    return ORJSONResponse(content=result, status_code=status.HTTP_200_OK)
   raise HTTPException(
         status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
         detail=err,
     )
 
 @app.get("/object")
-def get_object_handler(path):
-  path = b64decode(path).decode('utf-8')
-  file_name, file_content = s3.get_object(path)
+def get_object_handler(path, if_none_match: str = Header(None)):
+  path = decode_path(path)
+  file_name, obj, validators = s3.get_object(path, if_none_match)
+  headers = {
+    **validators,
+    'Cache-Control': 'public, max-age=300',
+    'Access-Control-Expose-Headers': 'Content-Disposition, ETag, Last-Modified'
+  }
+  if obj is None:
+    # The client's copy is still current
+    return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
   file_name = file_name.encode('latin-1').decode('latin-1')
-  return Response(
-    content = file_content,
+  file_stream = obj['Body']
+  return StreamingResponse(
+    content = file_stream.iter_chunks(CHUNK_SIZE),
     headers = {
       'Content-Disposition': 'attachment;filename={}'.format(file_name),
       'Content-Type': 'application/octet-stream',
-      'Access-Control-Expose-Headers': 'Content-Disposition'
-    }
+      'Content-Length': str(obj['ContentLength']),
+      **headers
+    },
+    background = BackgroundTask(file_stream.close),
   )
 
 @app.delete("/object")
 def delete_object_handler(path):
-  path = b64decode(path).decode('utf-8')
+  path = decode_path(path)
   result, err = s3.delete_object(path)
   if result:
-    return JSONResponse(content=result, status_code=status.HTTP_200_OK)
+    return ORJSONResponse(content=result, status_code=status.HTTP_200_OK)
+  raise HTTPException(
+        status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+        detail=err,
+    )
+
+@app.post("/objects/delete")
+def delete_objects_handler(paths: list[str] = Body(..., embed=True)):
+  paths = [decode_path(path) for path in paths]
+  result, err = s3.delete_objects_bulk(paths)
+  if result:
+    return ORJSONResponse(content=result, status_code=status.HTTP_200_OK)
   raise HTTPException(
         status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
         detail=err,
@@ -80,11 +122,11 @@ def delete_object_handler(path):
 
 @app.post("/object")
 def put_object_handler(path, file: UploadFile = File(...)):
-  path = b64decode(path).decode('utf-8')
+  path = decode_path(path)
   file_name = file.filename
-  result, err = s3.put_object('{}{}'.format(path, file_name), file.file.read())
+  result, err = s3.put_object('{}{}'.format(path, file_name), file.file)
   if result:
-    return JSONResponse(content={"msg": "hey"}, status_code=status.HTTP_200_OK)
+    return ORJSONResponse(content={"msg": "hey"}, status_code=status.HTTP_200_OK)
   raise HTTPException(
         status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
         detail=err,